@@ -2,10 +2,50 @@
 Convert a document to PDF using LibreOffice.
 """
 
+import logging
+import math
 import os
+import queue
+import shutil
 import subprocess
-from typing import Any, Optional
-from .util import get_temp_directory, ensure_directory
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from .util import get_output_directory, get_temp_directory, ensure_directory
+from .office_server import get_office_server
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of documents passed to a single LibreOffice invocation
+CONVERT_BATCH_SIZE = 64
+
+# Minimum number of documents per LibreOffice invocation before a batch is
+# split over parallel processes, as each process pays the startup cost
+MIN_CONVERT_BATCH_SIZE = 8
+
+# LibreOffice user profiles not currently used by a running conversion
+_free_profiles: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+
+
+@contextmanager
+def _user_profile() -> Iterator[str]:
+    """
+    Borrow a LibreOffice user profile no other conversion is using.
+
+    Concurrent soffice processes sharing a profile hand their work to each
+    other instead of running in parallel, so every process gets its own.
+    Profiles are reused afterwards to avoid initializing a new one each time,
+    and removed along with the other scratch files when the process exits.
+    """
+    try:
+        profile = _free_profiles.get_nowait()
+    except queue.Empty:
+        profile = get_temp_directory()
+    try:
+        yield Path(profile).as_uri()
+    finally:
+        _free_profiles.put(profile)
 
 class PdfConverter:
     """
@@ -20,6 +60,28 @@ class PdfConverter:
             libreoffice_path: Path to the LibreOffice executable
         """
         self.libreoffice_path = libreoffice_path
+        # subprocess only uses posix_spawn for executables given with a path,
+        # so look up a bare command name on PATH once
+        self._executable = shutil.which(str(libreoffice_path)) or str(libreoffice_path)
+
+    def _convert_with_office_server(self, input_path: str, output_path: str) -> bool:
+        """
+        Convert a document using the shared LibreOffice instance, if running.
+
+        Returns:
+            True if the document was converted, False if the caller needs to
+            fall back to launching LibreOffice itself
+        """
+        office_server = get_office_server(self.libreoffice_path)
+        if office_server is None:
+            return False
+
+        try:
+            office_server.convert_to_pdf(input_path, output_path)
+            return True
+        except Exception as e:
+            logger.warning("Conversion via running LibreOffice failed, falling back: %s", e)
+            return False
 
     def convert_to_pdf(self, input_path: str, output_directory: str = None) -> str:
         """
@@ -36,39 +98,131 @@ class PdfConverter:
             raise FileNotFoundError(f"Input file not found: {input_path}")
 
         if output_directory is None:
-            output_directory = get_temp_directory()
+            output_directory = get_output_directory()
         else:
             ensure_directory(output_directory)
 
-        # Construct the LibreOffice command
-        cmd = [
-            self.libreoffice_path,
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            output_directory,
-            input_path,
-        ]
+        # Get the output filename
+        input_filename = os.path.basename(input_path)
+        output_filename = os.path.splitext(input_filename)[0] + ".pdf"
+        output_path = os.path.join(output_directory, output_filename)
 
-        try:
-            # Run the conversion
-            process = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        if self._convert_with_office_server(input_path, output_path):
+            return output_path
+
+        self._run_libreoffice([input_path], output_directory)
 
-            # Get the output filename
+        if not os.path.exists(output_path):
+            raise RuntimeError(
+                f"Conversion failed: Output file not found at {output_path}"
+            )
+
+        return output_path
+
+    def _run_libreoffice(self, input_paths: list[str], output_directory: str) -> None:
+        """
+        Convert documents to PDF by launching LibreOffice once for all of them.
+
+        Args:
+            input_paths: Paths to the input documents
+            output_directory: Directory to save the PDFs
+        """
+        with _user_profile() as profile_url:
+            # Construct the LibreOffice command
+            cmd = [
+                self._executable,
+                f"-env:UserInstallation={profile_url}",
+                "--headless",
+                "--norestore",
+                "--nologo",
+                "--nofirststartwizard",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                output_directory,
+                *input_paths,
+            ]
+
+            try:
+                # Run the conversion, keeping only stderr for error reporting.
+                # Descriptors opened by Python are not inheritable anyway, and
+                # not closing them lets subprocess use the cheaper posix_spawn
+                # instead of fork and exec.
+                subprocess.run(
+                    cmd,
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    close_fds=False,
+                )
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode("utf-8", "replace")
+                raise RuntimeError(f"LibreOffice conversion failed: {stderr}")
+
+    def convert_many_to_pdf(
+        self, input_paths: list[str], output_directory: str = None
+    ) -> list[str]:
+        """
+        Convert several documents to PDF, amortizing the LibreOffice startup
+        over as many documents per invocation as possible.
+
+        Args:
+            input_paths: Paths to the input documents
+            output_directory: Directory to save the PDFs (optional)
+
+        Returns:
+            Paths to the output PDF files, in the order of input_paths
+        """
+        for input_path in input_paths:
+            if not os.path.exists(input_path):
+                raise FileNotFoundError(f"Input file not found: {input_path}")
+
+        if output_directory is None:
+            output_directory = get_output_directory()
+        else:
+            ensure_directory(output_directory)
+
+        output_paths = []
+        for input_path in input_paths:
             input_filename = os.path.basename(input_path)
             output_filename = os.path.splitext(input_filename)[0] + ".pdf"
-            output_path = os.path.join(output_directory, output_filename)
+            output_paths.append(os.path.join(output_directory, output_filename))
 
-            if not os.path.exists(output_path):
+        # Documents the running LibreOffice could not handle are batch converted
+        pending_paths = [
+            input_path
+            for input_path, output_path in zip(input_paths, output_paths)
+            if not self._convert_with_office_server(input_path, output_path)
+        ]
+
+        if pending_paths:
+            # Spread the documents over parallel LibreOffice processes
+            max_workers = min(
+                math.ceil(len(pending_paths) / MIN_CONVERT_BATCH_SIZE),
+                max(1, (os.cpu_count() or 1) // 2),
+            )
+            batch_size = min(CONVERT_BATCH_SIZE, math.ceil(len(pending_paths) / max_workers))
+            batches = [
+                pending_paths[start:start + batch_size]
+                for start in range(0, len(pending_paths), batch_size)
+            ]
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Consume the results so conversion errors are raised here
+                list(executor.map(
+                    lambda batch: self._run_libreoffice(batch, output_directory), batches
+                ))
+
+        # List the output directory once instead of checking every file
+        with os.scandir(output_directory) as entries:
+            existing_filenames = {entry.name for entry in entries}
+        for output_path in output_paths:
+            if os.path.basename(output_path) not in existing_filenames:
                 raise RuntimeError(
                     f"Conversion failed: Output file not found at {output_path}"
                 )
 
-            return output_path
-
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"LibreOffice conversion failed: {e.stderr}")
+        return output_paths
 
     def tool_convert_docx_to_pdf(
         self, file_path: str, output_directory: Optional[str] = None
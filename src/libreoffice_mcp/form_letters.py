@@ -2,15 +2,170 @@
 Form letter generation functionality
 """
 
+import bisect
+import copy
+import functools
+import io
 import os
-import shutil
+import re
 import logging
-from typing import Any
-from docx import Document
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, Optional
+from lxml import etree
 
-from .util import get_temp_directory, ensure_directory
+from .util import (
+    atomic_write,
+    ensure_directory,
+    fsync_directory,
+    get_output_directory,
+    get_temp_directory,
+    link_or_copy,
+)
 from .convert_pdf import PdfConverter
 
+# Minimum number of recipients for which letters are generated in parallel
+PARALLEL_RENDER_THRESHOLD = 4
+
+# Part of a .docx package holding the main document body
+DOCUMENT_PART = "word/document.xml"
+
+WORDML_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Shared parser for document parts: skips xml:id indexing and entity
+# resolution, neither of which placeholder substitution needs
+_PARSER = etree.XMLParser(
+    huge_tree=True, collect_ids=False, remove_blank_text=False, resolve_entities=False
+)
+
+# Text nodes which may contain a placeholder
+_PLACEHOLDER_TEXT_XPATH = etree.XPath(
+    "//w:t[contains(., '{{')]", namespaces={"w": WORDML_NS}
+)
+
+# A {{field}} placeholder, capturing the field name
+_PLACEHOLDER_RE = re.compile(r"\{\{([^{}]+)\}\}")
+
+# Paragraphs which may contain a placeholder split over several runs
+_PLACEHOLDER_PARAGRAPH_XPATH = etree.XPath(
+    "//w:p[contains(., '{{')]", namespaces={"w": WORDML_NS}
+)
+
+_PARAGRAPH_TAG = f"{{{WORDML_NS}}}p"
+_TEXT_TAG = f"{{{WORDML_NS}}}t"
+_TAB_TAG = f"{{{WORDML_NS}}}tab"
+_BREAK_TAG = f"{{{WORDML_NS}}}br"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# Characters which Word stores as elements rather than as text
+_TAB_OR_BREAK_RE = re.compile(r"([\t\n\r])")
+
+
+def _merge_split_placeholders(document: etree._Element) -> None:
+    """
+    Move placeholders which Word split over several runs (e.g. by spell
+    checking or partial formatting) into the first of those runs, so each
+    placeholder is found within a single text node.
+
+    The text before and after a placeholder stays in its run, so the
+    formatting of the surrounding text is kept.
+
+    Args:
+        document: The parsed document part, which is modified in place
+    """
+    for paragraph in _PLACEHOLDER_PARAGRAPH_XPATH(document):
+        # Text nodes of this paragraph, not of paragraphs nested in it
+        text_nodes = [
+            text_node
+            for text_node in paragraph.iter(_TEXT_TAG)
+            if next(text_node.iterancestors(_PARAGRAPH_TAG)) is paragraph
+        ]
+        texts = [text_node.text or "" for text_node in text_nodes]
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text)
+
+        # Work backwards so the offsets of earlier placeholders stay valid
+        matches = list(_PLACEHOLDER_RE.finditer("".join(texts)))
+        for match in reversed(matches):
+            first = bisect.bisect_right(starts, match.start()) - 1
+            last = bisect.bisect_right(starts, match.end() - 1) - 1
+            if first == last:
+                continue
+
+            texts[first] = texts[first][:match.start() - starts[first]] + match.group(0)
+            for index in range(first + 1, last):
+                texts[index] = ""
+            texts[last] = texts[last][match.end() - starts[last]:]
+
+            for index in range(first, last + 1):
+                text_nodes[index].text = texts[index]
+                text_nodes[index].set(_XML_SPACE, "preserve")
+
+
+class _Template(NamedTuple):
+    """A template read into memory"""
+
+    data: bytes
+    """The raw template document"""
+    parts: tuple[tuple[zipfile.ZipInfo, bytes], ...]
+    """The decompressed parts of the template package"""
+    document: etree._Element
+    """The parsed document part, with split placeholders merged"""
+    field_names: frozenset[str]
+    """The fields with a placeholder in the document part"""
+
+
+def _set_text(text_node: etree._Element, text: str) -> None:
+    """
+    Set the text of a run's text node, storing tabs and line breaks as
+    w:tab and w:br elements the way python-docx does
+
+    Args:
+        text_node: The w:t element, which is modified in place
+        text: The text to store
+    """
+    pieces = _TAB_OR_BREAK_RE.split(text)
+    text_node.text = pieces[0]
+    text_node.set(_XML_SPACE, "preserve")
+
+    # Add the elements for the remaining pieces after the text node
+    previous = text_node
+    for separator, piece in zip(pieces[1::2], pieces[2::2]):
+        element = text_node.makeelement(_TAB_TAG if separator == "\t" else _BREAK_TAG)
+        previous.addnext(element)
+        previous = element
+        if piece:
+            element = text_node.makeelement(_TEXT_TAG)
+            element.text = piece
+            element.set(_XML_SPACE, "preserve")
+            previous.addnext(element)
+            previous = element
+
+
+@functools.lru_cache(maxsize=8)
+def _read_template(template_path: str, mtime: float) -> _Template:
+    """
+    Read and parse a template. Cached for all generators, keyed on the
+    template's mtime so a modified template is read again.
+    """
+    with open(template_path, "rb") as f:
+        data = f.read()
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        parts = tuple((item, zin.read(item)) for item in zin.infolist())
+        document = etree.fromstring(zin.read(DOCUMENT_PART), parser=_PARSER)
+    # Normalize the template once rather than for every recipient
+    _merge_split_placeholders(document)
+    field_names = frozenset(
+        field_name
+        for text_node in _PLACEHOLDER_TEXT_XPATH(document)
+        for field_name in _PLACEHOLDER_RE.findall(text_node.text)
+    )
+    return _Template(data, parts, document, field_names)
+
 class FormLetterGenerator:
     logger = logging.getLogger(__name__)
 
@@ -28,8 +183,24 @@ class FormLetterGenerator:
         self.libreoffice_path = libreoffice_path
         self.pdf_converter = PdfConverter(libreoffice_path)
 
+    def _load_template(self, template_path: str) -> _Template:
+        """
+        Read and parse a template, reusing the result of earlier reads until
+        the file is modified
+
+        Args:
+            template_path: Path to the template document
+
+        Returns:
+            The template read into memory
+        """
+        return _read_template(template_path, os.path.getmtime(template_path))
+
     def _replace_placeholders(
-        self, template_path: str, recipient_data: dict[str, str]
+        self,
+        template_path: str,
+        recipient_data: dict[str, str],
+        compression: Optional[int] = None,
     ) -> str:
         """
         Replace placeholders in a template with recipient data
@@ -37,40 +208,68 @@ class FormLetterGenerator:
         Args:
             template_path: Path to the template document
             recipient_data: Dictionary of field names and values
+            compression: ZIP compression method for the generated document
+                (optional, defaults to the compression of the template parts)
 
         Returns:
             Path to the generated document
         """
-        # Load the template document
-        doc = Document(template_path)
-
-        # Replace placeholders in paragraphs
-        for paragraph in doc.paragraphs:
-            for field_name, field_value in recipient_data.items():
-                placeholder = f"{{{{{field_name}}}}}"
-                if placeholder in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder, field_value)
-
-        # Replace placeholders in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for field_name, field_value in recipient_data.items():
-                        placeholder = f"{{{{{field_name}}}}}"
-                        for paragraph in cell.paragraphs:
-                            if placeholder in paragraph.text:
-                                paragraph.text = paragraph.text.replace(
-                                    placeholder, field_value
-                                )
-
-        # Save the generated document
         output_dir = get_temp_directory()
         recipient_name = recipient_data.get("name", "recipient").replace(" ", "_")
         output_path = os.path.join(output_dir, f"letter_{recipient_name}.docx")
-        doc.save(output_path)
+
+        template = self._load_template(template_path)
+
+        if template.field_names.isdisjoint(recipient_data):
+            # Nothing to replace, the letter is the template itself
+            with atomic_write(output_path) as f:
+                f.write(template.data)
+            return output_path
+
+        # Copy the template package, substituting the placeholders in the
+        # document body
+        with atomic_write(output_path) as f, zipfile.ZipFile(f, "w") as zout:
+            for item, data in template.parts:
+                if item.filename == DOCUMENT_PART:
+                    data = self._substitute(template.document, recipient_data)
+                # Writing fills in sizes and offsets, so leave the cached
+                # entry untouched for the other letters
+                item = copy.copy(item)
+                if compression is not None:
+                    item.compress_type = compression
+                zout.writestr(item, data)
 
         return output_path
 
+    def _substitute(self, document: etree._Element, recipient_data: dict[str, str]) -> bytes:
+        """
+        Replace placeholders in the text nodes of a copy of a document part
+
+        Args:
+            document: The parsed document part, which is left unchanged
+            recipient_data: Dictionary of field names and values
+
+        Returns:
+            The serialized document part with placeholders replaced
+        """
+        def replace(match: re.Match) -> str:
+            # Keep placeholders of fields this recipient has no value for
+            return recipient_data.get(match.group(1), match.group(0))
+
+        substitute = _PLACEHOLDER_RE.sub
+
+        # Copying the parsed template is cheaper than parsing it again, and
+        # the XPath query hands back only the text nodes worth looking at
+        root = copy.deepcopy(document)
+        for text_node in _PLACEHOLDER_TEXT_XPATH(root):
+            text = substitute(replace, text_node.text)
+            if _TAB_OR_BREAK_RE.search(text):
+                _set_text(text_node, text)
+            else:
+                text_node.text = text
+
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
     def _generate_form_letters(
         self,
         template_path: str,
@@ -95,27 +294,47 @@ class FormLetterGenerator:
             raise FileNotFoundError(f"Template file not found: {template_path}")
 
         if output_directory is None:
-            output_directory = get_temp_directory()
+            output_directory = get_output_directory()
         else:
             ensure_directory(output_directory)
 
-        output_paths = []
+        # Documents only converted to PDF are thrown away afterwards, so
+        # skip compressing them
+        compression = zipfile.ZIP_STORED if output_format.lower() == "pdf" else None
 
-        for recipient in recipients:
-            # Generate the document with replaced placeholders
-            docx_path = self._replace_placeholders(template_path, recipient)
+        # Generate the documents with replaced placeholders
+        if len(recipients) < PARALLEL_RENDER_THRESHOLD:
+            docx_paths = [
+                self._replace_placeholders(template_path, recipient, compression)
+                for recipient in recipients
+            ]
+        else:
+            # Load the template up front so the workers share one copy
+            self._load_template(template_path)
+            max_workers = min(len(recipients), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                docx_paths = list(executor.map(
+                    lambda recipient: self._replace_placeholders(
+                        template_path, recipient, compression
+                    ),
+                    recipients,
+                ))
 
-            if output_format.lower() == "pdf":
-                # Convert to PDF
-                output_path = self.pdf_converter.convert_to_pdf(docx_path, output_directory)
-            else:
-                # Copy the DOCX to the output directory
-                output_filename = os.path.basename(docx_path)
-                output_path = os.path.join(output_directory, output_filename)
-                shutil.copy2(docx_path, output_path)
+        if output_format.lower() == "pdf":
+            # Convert all documents with as few LibreOffice launches as possible
+            return self.pdf_converter.convert_many_to_pdf(docx_paths, output_directory)
 
+        output_paths = []
+        for docx_path in docx_paths:
+            # Link the DOCX into the output directory
+            output_filename = os.path.basename(docx_path)
+            output_path = os.path.join(output_directory, output_filename)
+            link_or_copy(docx_path, output_path)
             output_paths.append(output_path)
 
+        # Flush the directory once for the whole batch
+        fsync_directory(output_directory)
+
         return output_paths
 
     # Define the generate_form_letters tool
@@ -0,0 +1,226 @@
+"""
+Persistent LibreOffice instance driven over a UNO socket connection.
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import uno
+    from com.sun.star.connection import NoConnectException
+except ImportError:
+    # pyuno is only available when running on LibreOffice's Python bindings
+    uno = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a freshly started LibreOffice to accept connections
+CONNECT_TIMEOUT = 15.0
+
+
+def _property(name: str, value: Any) -> Any:
+    """Create a com.sun.star.beans.PropertyValue"""
+    prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def _free_port(host: str) -> int:
+    """Find a port nothing is listening on yet"""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class OfficeServer:
+    """
+    A single headless LibreOffice process accepting UNO connections, so
+    conversions do not pay the LibreOffice startup cost each time
+    """
+
+    def __init__(
+        self,
+        libreoffice_path: str = "soffice",
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+    ):
+        """
+        Initialize the office server
+
+        Args:
+            libreoffice_path: Path to the LibreOffice executable
+            host: Host the UNO socket listens on
+            port: Port the UNO socket listens on (optional, defaults to a
+                free port)
+        """
+        self.libreoffice_path = libreoffice_path
+        self.host = host
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+        self._profile_dir: Optional[str] = None
+        self._desktop = None
+        self._failed = False
+        # One LibreOffice instance processes one document at a time
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether conversions can be sent to this server"""
+        return self.process is not None and self.process.poll() is None and not self._failed
+
+    def start(self) -> None:
+        """Launch LibreOffice listening on the UNO socket"""
+        if self.port is None:
+            self.port = _free_port(self.host)
+
+        # With the user's default profile, an already running LibreOffice
+        # (e.g. the GUI or another server) would take over this instance
+        self._profile_dir = tempfile.mkdtemp(prefix="libreoffice_mcp_profile_")
+
+        cmd = [
+            str(self.libreoffice_path),
+            f"-env:UserInstallation={Path(self._profile_dir).as_uri()}",
+            "--headless",
+            f"--accept=socket,host={self.host},port={self.port};urp;",
+            "--norestore",
+            "--nologo",
+            "--nodefault",
+            "--nolockcheck",
+        ]
+        self.process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        logger.info("Started LibreOffice (pid %d) on port %d", self.process.pid, self.port)
+
+    def stop(self) -> None:
+        """Shut down the LibreOffice process"""
+        with self._lock:
+            terminated = False
+            if self._desktop is not None:
+                try:
+                    terminated = self._desktop.terminate()
+                except Exception:
+                    pass
+                self._desktop = None
+
+            if self.process is not None:
+                if not terminated:
+                    self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+                self.process = None
+
+            if self._profile_dir is not None:
+                shutil.rmtree(self._profile_dir, ignore_errors=True)
+                self._profile_dir = None
+
+    def _connect(self) -> Any:
+        """Connect to the running LibreOffice and return its desktop"""
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        url = f"uno:socket,host={self.host},port={self.port};urp;StarOffice.ComponentContext"
+
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(url)
+                break
+            except NoConnectException:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.1)
+
+        return context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+
+    def convert_to_pdf(self, input_path: str, output_path: str) -> None:
+        """
+        Convert a document to PDF using the running LibreOffice.
+
+        Args:
+            input_path: Path to the input document
+            output_path: Path of the PDF file to write
+        """
+        with self._lock:
+            if self._desktop is None:
+                try:
+                    self._desktop = self._connect()
+                except Exception:
+                    self._failed = True
+                    raise
+
+            document = self._desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(input_path)),
+                "_blank",
+                0,
+                (_property("Hidden", True),),
+            )
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                    (_property("FilterName", "writer_pdf_Export"),),
+                )
+            finally:
+                document.close(True)
+
+
+_office_server: Optional[OfficeServer] = None
+_office_server_lock = threading.Lock()
+
+
+def start_office_server(libreoffice_path: str = "soffice") -> Optional[OfficeServer]:
+    """Start the shared LibreOffice instance if the UNO bindings are available"""
+    global _office_server
+
+    if uno is None:
+        logger.info("pyuno not available, converting with one LibreOffice process per call")
+        return None
+
+    with _office_server_lock:
+        if _office_server is None:
+            _office_server = OfficeServer(libreoffice_path)
+            _office_server.start()
+        return _office_server
+
+
+@atexit.register
+def stop_office_server() -> None:
+    """Stop the shared LibreOffice instance"""
+    global _office_server
+
+    with _office_server_lock:
+        if _office_server is not None:
+            _office_server.stop()
+            _office_server = None
+
+
+def get_office_server(libreoffice_path: str = "soffice") -> Optional[OfficeServer]:
+    """
+    Get the shared LibreOffice instance, starting it on first use.
+
+    Returns None if the UNO bindings are not available or the instance
+    cannot be used, in which case callers launch LibreOffice themselves.
+    """
+    if uno is None:
+        return None
+
+    office_server = start_office_server(libreoffice_path)
+    if office_server is not None and office_server.available:
+        return office_server
+    return None
@@ -1,9 +1,13 @@
 """
 LibreOffice MCP Server using the MCP protocol library
 """
+import asyncio
+import functools
+import json
 import logging
 from pathlib import Path
 from enum import Enum
+from typing import Any, Optional
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -14,6 +18,12 @@ from pydantic import BaseModel
 
 from .form_letters import FormLetterGenerator
 from .convert_pdf import PdfConverter
+from .office_server import start_office_server, stop_office_server
+
+class ConversionRequest(BaseModel):
+    file_path: str
+    output_directory: Optional[str] = None
+
 
 class ConversionResponse(BaseModel):
     output_path: str
@@ -22,7 +32,7 @@ class ConversionResponse(BaseModel):
 
 
 class FormLetterRequest(BaseModel):
-    template_id: str
+    template_path: str
     recipients: list[dict[str, str]]
     output_format: str = "pdf"
 
@@ -40,44 +50,68 @@ class LibreOfficeTools(str, Enum):
     CONVERT_DOCX_TO_PDF = "convert_docx_to_pdf"
     GENERATE_FORM_LETTERS = "generate_form_letters"
 
+@functools.lru_cache(maxsize=1)
+def _list_tools() -> tuple[Tool, ...]:
+    """Build the tool descriptions once, since the set of tools is fixed"""
+    return (
+        Tool(
+            name=LibreOfficeTools.CONVERT_DOCX_TO_PDF,
+            description="Convert a .docx document to PDF format",
+            inputSchema=ConversionRequest.model_json_schema(),
+        ),
+        Tool(
+            name=LibreOfficeTools.GENERATE_FORM_LETTERS,
+            description="Generate form letters from a template and recipient data",
+            inputSchema=FormLetterRequest.model_json_schema(),
+            outputSchema=FormLetterResponse.model_json_schema(),
+        )
+    )
+
 async def serve(libreoffice_path: Path) -> None:
 
     server = Server("libreoffice_mcp")
 
     @server.list_tools()
     async def list_tools() -> list[Tool]:
-        return [
-            Tool(
-                name=LibreOfficeTools.CONVERT_DOCX_TO_PDF,
-                description="Converts a .docx document to PDF format",
-                inputSchema=ConversionResponse.model_json_schema(),
-            ),
-            Tool(
-                name=LibreOfficeTools.GENERATE_FORM_LETTERS,
-                description="Shows changes in the working directory that are not yet staged",
-                inputSchema=FormLetterRequest.model_json_schema(),
-                outputSchema=FormLetterResponse.model_json_schema(),
-            )
-        ]
+        return list(_list_tools())
 
     @server.call_tool()
-    async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+    async def call_tool(
+        name: str, arguments: dict
+    ) -> list[TextContent] | tuple[list[TextContent], dict[str, Any]]:
         match name:
             case LibreOfficeTools.CONVERT_DOCX_TO_PDF:
-                result = PdfConverter(libreoffice_path).tool_convert_docx_to_pdf(str(arguments["file_path"]))
+                # Convert in a worker thread so the server keeps handling messages
+                result = await asyncio.to_thread(
+                    PdfConverter(libreoffice_path).tool_convert_docx_to_pdf,
+                    str(arguments["file_path"]),
+                    arguments.get("output_directory"),
+                )
                 return [TextContent(
                     type="text",
-                    text=result
+                    text=json.dumps(result, separators=(",", ":"))
                 )]
             case LibreOfficeTools.GENERATE_FORM_LETTERS:
-                result = FormLetterGenerator(libreoffice_path).tool_generate_form_letters(str(arguments["template_path"]))
+                result = await asyncio.to_thread(
+                    FormLetterGenerator(libreoffice_path).tool_generate_form_letters,
+                    str(arguments["template_path"]),
+                    arguments["recipients"],
+                    arguments.get("output_format", "pdf"),
+                )
+                # The tool declares an output schema, so the result is also
+                # returned as structured content
                 return [TextContent(
                     type="text",
-                    text=result
-                )]
+                    text=json.dumps(result, separators=(",", ":"))
+                )], result
             case _:
                 raise ValueError(f"Unknown tool: {name}")
 
-    options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
\ No newline at end of file
+    # Keep one LibreOffice running for the lifetime of the server
+    start_office_server(libreoffice_path)
+    try:
+        options = server.create_initialization_options()
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        stop_office_server()
\ No newline at end of file
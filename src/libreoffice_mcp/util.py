@@ -1,8 +1,14 @@
 """Utility functions for file operations."""
 
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+import atexit
+import itertools
 import os
+import shutil
 import tempfile
+import threading
 import uuid
 
 def ensure_directory(directory_path: str) -> None:
@@ -10,8 +16,93 @@ def ensure_directory(directory_path: str) -> None:
     Path(directory_path).mkdir(parents=True, exist_ok=True)
 
 
+class _TempPool:
+    """Hands out fresh, numbered directories below one base directory per process."""
+
+    # Number of directories created at once
+    BATCH_SIZE = 16
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def _reset(self) -> None:
+        self._base_dir = tempfile.mkdtemp(prefix="libreoffice_mcp_")
+        self._counter = itertools.count()
+        self._created = 0
+        self._pid = os.getpid()
+        atexit.register(shutil.rmtree, self._base_dir, ignore_errors=True)
+
+    def get(self) -> str:
+        with self._lock:
+            # A forked child must not hand out its parent's directories
+            if self._pid != os.getpid():
+                self._reset()
+
+            index = next(self._counter)
+            if index >= self._created:
+                for i in range(self._created, self._created + self.BATCH_SIZE):
+                    os.mkdir(os.path.join(self._base_dir, str(i)))
+                self._created += self.BATCH_SIZE
+
+            return os.path.join(self._base_dir, str(index))
+
+
+_temp_pool = _TempPool()
+
+
 def get_temp_directory() -> str:
-    """Get a temporary directory for file operations."""
-    temp_dir = os.path.join(tempfile.gettempdir(), "libreoffice_mcp", str(uuid.uuid4()))
-    ensure_directory(temp_dir)
-    return temp_dir
\ No newline at end of file
+    """Get a scratch directory for file operations, removed when the process exits."""
+    return _temp_pool.get()
+
+
+def get_output_directory() -> str:
+    """Get a new directory for output files, kept after the process exits."""
+    output_dir = os.path.join(tempfile.gettempdir(), "libreoffice_mcp", str(uuid.uuid4()))
+    ensure_directory(output_dir)
+    return output_dir
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """Write a file under a temporary name and move it into place once complete."""
+    directory, filename = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def link_or_copy(source_path: str, target_path: str) -> None:
+    """Hard link a file to a new path, copying it if linking is not possible."""
+    # Create the file under a temporary name next to the target and move it
+    # into place, so the target path never shows a partial or missing file
+    directory, filename = os.path.split(target_path)
+    temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(source_path, temp_path)
+        except OSError:
+            # Different file systems or no hard link support
+            shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, target_path)
+    finally:
+        # Left over after a failure, or when the target already was a link
+        # to the same file, in which case renaming does nothing
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
+
+
+def fsync_directory(directory_path: str) -> None:
+    """Flush the entries of a directory, making preceding renames durable."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
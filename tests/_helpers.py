@@ -0,0 +1,43 @@
+"""
+Helpers shared by the test modules
+"""
+
+import functools
+import importlib.util
+import os
+import shutil
+import subprocess
+import tempfile
+
+
+@functools.lru_cache(maxsize=1)
+def is_libreoffice_available():
+    """Check if LibreOffice is available on the system"""
+    if shutil.which("soffice") is None:
+        return False
+
+    # Only actually launch LibreOffice when asked to
+    if os.environ.get("LO_STRICT_CHECK") != "1":
+        return True
+
+    try:
+        # Try to run LibreOffice with --version
+        subprocess.run(
+            ["soffice", "--version"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return True
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return False
+
+
+def is_python_docx_available():
+    """Check if python-docx is installed, without importing it"""
+    return importlib.util.find_spec("docx") is not None
+
+
+def make_temp_directory():
+    """Create a temporary directory, in memory-backed /dev/shm if available"""
+    return tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration
+"""
+
+import pathlib
+import sys
+
+# Make the package under test importable without installing it
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
@@ -3,65 +3,83 @@
 Tests for the DOCX to PDF conversion functionality
 """
 
+import functools
+import io
 import os
 import unittest
-import tempfile
 import shutil
 
-# Add parent directory to path to import modules
-import sys
+from libreoffice_mcp.convert_pdf import PdfConverter
+from _helpers import (
+    is_libreoffice_available,
+    is_python_docx_available,
+    make_temp_directory,
+)
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.server import convert_to_pdf
+@functools.lru_cache(maxsize=1)
+def _build_test_docx():
+    """Build the test DOCX file using python-docx"""
+    if not is_python_docx_available():
+        # If python-docx is not available, use a dummy file
+        # (the test will be skipped)
+        return b"Test document"
+
+    from docx import Document
+
+    # Create a simple document
+    doc = Document()
+    doc.add_heading("Test Document", 0)
+    doc.add_paragraph("This is a test document for DOCX to PDF conversion.")
+    doc.add_paragraph(
+        "It contains some simple text to verify the conversion works."
+    )
+
+    # Save the document once and reuse its contents for every test
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
 
 
 class TestDocxToPdfConversion(unittest.TestCase):
     """Test cases for DOCX to PDF conversion"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Set up the temporary directory shared by all tests"""
+        cls.shared_dir = make_temp_directory()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temporary directory and its contents"""
+        shutil.rmtree(cls.shared_dir, ignore_errors=True)
+
     def setUp(self):
         """Set up test environment"""
-        # Create a temporary directory for test files
-        self.test_dir = tempfile.mkdtemp()
+        # Create a directory for this test's files
+        self.test_dir = os.path.join(self.shared_dir, self.id())
+        os.makedirs(self.test_dir)
 
         # Create a simple test DOCX file
         self.test_docx_path = os.path.join(self.test_dir, "test_document.docx")
         self._create_test_docx()
 
-    def tearDown(self):
-        """Clean up test environment"""
-        # Remove the temporary directory and its contents
-        shutil.rmtree(self.test_dir)
+        # Initialize the PDF converter
+        self.converter = PdfConverter()
 
     def _create_test_docx(self):
-        """Create a test DOCX file using python-docx"""
-        try:
-            from docx import Document
-
-            # Create a simple document
-            doc = Document()
-            doc.add_heading("Test Document", 0)
-            doc.add_paragraph("This is a test document for DOCX to PDF conversion.")
-            doc.add_paragraph(
-                "It contains some simple text to verify the conversion works."
-            )
-
-            # Save the document
-            doc.save(self.test_docx_path)
-        except ImportError:
-            # If python-docx is not available, create an empty file
-            # (the test will be skipped)
-            with open(self.test_docx_path, "w") as f:
-                f.write("Test document")
+        """Create a test DOCX file"""
+        with open(self.test_docx_path, "wb") as f:
+            f.write(_build_test_docx())
 
     def test_convert_to_pdf_exists(self):
         """Test that the convert_to_pdf function exists"""
-        self.assertTrue(callable(convert_to_pdf))
+        self.assertTrue(callable(self.converter.convert_to_pdf))
 
     def test_convert_to_pdf_output_directory(self):
         """Test conversion with a specified output directory"""
         # Skip if LibreOffice is not available
-        if not self._is_libreoffice_available():
+        if not is_libreoffice_available():
             self.skipTest("LibreOffice not available")
 
         # Create output directory
@@ -70,7 +88,7 @@ class TestDocxToPdfConversion(unittest.TestCase):
 
         # Convert the test document
         try:
-            output_path = convert_to_pdf(self.test_docx_path, output_dir)
+            output_path = self.converter.convert_to_pdf(self.test_docx_path, output_dir)
 
             # Check that the output file exists
             self.assertTrue(os.path.exists(output_path))
@@ -87,23 +105,7 @@ class TestDocxToPdfConversion(unittest.TestCase):
         """Test conversion with a nonexistent input file"""
         # Try to convert a nonexistent file
         with self.assertRaises(FileNotFoundError):
-            convert_to_pdf("/nonexistent/file.docx")
-
-    def _is_libreoffice_available(self):
-        """Check if LibreOffice is available on the system"""
-        import subprocess
-
-        try:
-            # Try to run LibreOffice with --version
-            subprocess.run(
-                ["soffice", "--version"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            return True
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
+            self.converter.convert_to_pdf("/nonexistent/file.docx")
 
 
 if __name__ == "__main__":
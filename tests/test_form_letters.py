@@ -3,26 +3,66 @@
 Tests for the form letter generation functionality
 """
 
+import functools
+import io
 import os
 import unittest
-import tempfile
 import shutil
-
-# Add parent directory to path to import modules
-import sys
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from src.form_letters import FormLetterGenerator
+from unittest.mock import patch
+
+from libreoffice_mcp.form_letters import FormLetterGenerator
+from _helpers import (
+    is_libreoffice_available,
+    is_python_docx_available,
+    make_temp_directory,
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_test_template():
+    """Build the test template DOCX file using python-docx"""
+    if not is_python_docx_available():
+        # If python-docx is not available, use a dummy file
+        # (the test will be skipped)
+        return b"Test template"
+
+    from docx import Document
+
+    # Create a template document with placeholders
+    doc = Document()
+    doc.add_heading("Form Letter Template", 0)
+    doc.add_paragraph("Dear {{name}},")
+    doc.add_paragraph("We are writing regarding your account {{reference}}.")
+    doc.add_paragraph("Your address on file is:")
+    doc.add_paragraph("{{address}}")
+    doc.add_paragraph("{{city}}")
+    doc.add_paragraph("Sincerely,")
+    doc.add_paragraph("The Company")
+
+    # Save the document once and reuse its contents for every test
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
 
 
 class TestFormLetterGeneration(unittest.TestCase):
     """Test cases for form letter generation"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Set up the temporary directory shared by all tests"""
+        cls.shared_dir = make_temp_directory()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temporary directory and its contents"""
+        shutil.rmtree(cls.shared_dir, ignore_errors=True)
+
     def setUp(self):
         """Set up test environment"""
-        # Create a temporary directory for test files
-        self.test_dir = tempfile.mkdtemp()
+        # Create a directory for this test's files
+        self.test_dir = os.path.join(self.shared_dir, self.id())
+        os.makedirs(self.test_dir)
 
         # Create a test template file
         self.template_path = os.path.join(self.test_dir, "template.docx")
@@ -47,34 +87,10 @@ class TestFormLetterGeneration(unittest.TestCase):
         # Initialize the form letter generator
         self.generator = FormLetterGenerator()
 
-    def tearDown(self):
-        """Clean up test environment"""
-        # Remove the temporary directory and its contents
-        shutil.rmtree(self.test_dir)
-
     def _create_test_template(self):
-        """Create a test template file using python-docx"""
-        try:
-            from docx import Document
-
-            # Create a template document with placeholders
-            doc = Document()
-            doc.add_heading("Form Letter Template", 0)
-            doc.add_paragraph("Dear {{name}},")
-            doc.add_paragraph("We are writing regarding your account {{reference}}.")
-            doc.add_paragraph("Your address on file is:")
-            doc.add_paragraph("{{address}}")
-            doc.add_paragraph("{{city}}")
-            doc.add_paragraph("Sincerely,")
-            doc.add_paragraph("The Company")
-
-            # Save the document
-            doc.save(self.template_path)
-        except ImportError:
-            # If python-docx is not available, create an empty file
-            # (the test will be skipped)
-            with open(self.template_path, "w") as f:
-                f.write("Test template")
+        """Create a test template file"""
+        with open(self.template_path, "wb") as f:
+            f.write(_build_test_template())
 
     def test_generator_initialization(self):
         """Test that the FormLetterGenerator initializes correctly"""
@@ -84,11 +100,11 @@ class TestFormLetterGeneration(unittest.TestCase):
     def test_replace_placeholders(self):
         """Test placeholder replacement in a template"""
         # Skip if python-docx is not available
-        try:
-            from docx import Document
-        except ImportError:
+        if not is_python_docx_available():
             self.skipTest("python-docx not available")
 
+        from docx import Document
+
         # Replace placeholders for the first recipient
         try:
             output_path = self.generator._replace_placeholders(
@@ -103,33 +119,80 @@ class TestFormLetterGeneration(unittest.TestCase):
 
             # Check that the placeholders were replaced
             doc = Document(output_path)
-            content = "\n".join([p.text for p in doc.paragraphs])
+            texts = [p.text for p in doc.paragraphs]
+
+            def contains(text):
+                # Stops at the first paragraph containing the text
+                return any(text in paragraph_text for paragraph_text in texts)
 
             # Check for replaced content
-            self.assertIn("Dear John Doe,", content)
-            self.assertIn("your account ABC123", content)
-            self.assertIn("123 Main St", content)
-            self.assertIn("Anytown", content)
+            self.assertTrue(contains("Dear John Doe,"))
+            self.assertTrue(contains("your account ABC123"))
+            self.assertTrue(contains("123 Main St"))
+            self.assertTrue(contains("Anytown"))
 
             # Check that placeholders were removed
-            self.assertNotIn("{{name}}", content)
-            self.assertNotIn("{{reference}}", content)
-            self.assertNotIn("{{address}}", content)
-            self.assertNotIn("{{city}}", content)
+            self.assertFalse(contains("{{name}}"))
+            self.assertFalse(contains("{{reference}}"))
+            self.assertFalse(contains("{{address}}"))
+            self.assertFalse(contains("{{city}}"))
         except Exception as e:
             self.fail(f"_replace_placeholders raised an exception: {e}")
 
+    def test_replace_split_placeholders(self):
+        """Test replacement of a placeholder split over several runs"""
+        # Skip if python-docx is not available
+        if not is_python_docx_available():
+            self.skipTest("python-docx not available")
+
+        from docx import Document
+
+        # Create a template where Word split the placeholder over two runs
+        doc = Document()
+        paragraph = doc.add_paragraph("Dear {{na")
+        paragraph.add_run("me}},").bold = True
+        doc.save(self.template_path)
+
+        output_path = self.generator._replace_placeholders(
+            self.template_path, self.recipients[0]
+        )
+
+        # Check that the placeholder was replaced and the formatting kept
+        paragraph = Document(output_path).paragraphs[0]
+        self.assertEqual(paragraph.text, "Dear John Doe,")
+        self.assertTrue(paragraph.runs[-1].bold)
+
+    def test_replace_placeholders_line_breaks(self):
+        """Test that line breaks and tabs in values are kept"""
+        # Skip if python-docx is not available
+        if not is_python_docx_available():
+            self.skipTest("python-docx not available")
+
+        from docx import Document
+
+        # Replace the address with one spanning several lines
+        recipient_data = dict(self.recipients[0], address="123 Main St\nAnytown\tX")
+        output_path = self.generator._replace_placeholders(
+            self.template_path, recipient_data
+        )
+
+        # Check that the line break and tab became w:br and w:tab elements
+        doc = Document(output_path)
+        paragraph = next(p for p in doc.paragraphs if "123 Main St" in p.text)
+        self.assertEqual(paragraph.text, "123 Main St\nAnytown\tX")
+        run_xml = paragraph.runs[0]._r.xml
+        self.assertIn("<w:br/>", run_xml)
+        self.assertIn("<w:tab/>", run_xml)
+
     def test_generate_form_letters_docx(self):
         """Test generation of form letters in DOCX format"""
         # Skip if python-docx is not available
-        try:
-            from docx import Document
-        except ImportError:
+        if not is_python_docx_available():
             self.skipTest("python-docx not available")
 
         # Generate form letters in DOCX format
         try:
-            output_paths = self.generator.generate_form_letters(
+            output_paths = self.generator._generate_form_letters(
                 template_path=self.template_path,
                 recipients=self.recipients,
                 output_format="docx",
@@ -144,17 +207,17 @@ class TestFormLetterGeneration(unittest.TestCase):
                 self.assertTrue(os.path.exists(path))
                 self.assertTrue(path.endswith(".docx"))
         except Exception as e:
-            self.fail(f"generate_form_letters raised an exception: {e}")
+            self.fail(f"_generate_form_letters raised an exception: {e}")
 
     def test_generate_form_letters_pdf(self):
         """Test generation of form letters in PDF format"""
         # Skip if LibreOffice is not available
-        if not self._is_libreoffice_available():
+        if not is_libreoffice_available():
             self.skipTest("LibreOffice not available")
 
         # Generate form letters in PDF format
         try:
-            output_paths = self.generator.generate_form_letters(
+            output_paths = self.generator._generate_form_letters(
                 template_path=self.template_path,
                 recipients=self.recipients,
                 output_format="pdf",
@@ -169,31 +232,46 @@ class TestFormLetterGeneration(unittest.TestCase):
                 self.assertTrue(os.path.exists(path))
                 self.assertTrue(path.endswith(".pdf"))
         except Exception as e:
-            self.fail(f"generate_form_letters raised an exception: {e}")
+            self.fail(f"_generate_form_letters raised an exception: {e}")
+
+    # Convert without a running LibreOffice instance, like without pyuno
+    @patch("libreoffice_mcp.convert_pdf.get_office_server", return_value=None)
+    @patch("libreoffice_mcp.convert_pdf.subprocess.run")
+    def test_generate_form_letters_pdf_single_invocation(self, mock_run, mock_get_office_server):
+        """Test that all letters are converted by a single LibreOffice process"""
+        # Skip if python-docx is not available
+        if not is_python_docx_available():
+            self.skipTest("python-docx not available")
+
+        def convert(cmd, **kwargs):
+            # Create the PDFs LibreOffice would have written
+            output_dir = cmd[cmd.index("--outdir") + 1]
+            for input_path in cmd[cmd.index("--outdir") + 2:]:
+                pdf_name = os.path.splitext(os.path.basename(input_path))[0] + ".pdf"
+                open(os.path.join(output_dir, pdf_name), "w").close()
+
+        mock_run.side_effect = convert
+
+        output_paths = self.generator._generate_form_letters(
+            template_path=self.template_path,
+            recipients=self.recipients,
+            output_format="pdf",
+            output_directory=os.path.join(self.test_dir, "output_pdf"),
+        )
+
+        # Check that LibreOffice was launched once for all recipients
+        mock_run.assert_called_once()
+        self.assertEqual(len(output_paths), len(self.recipients))
+        for path in output_paths:
+            self.assertTrue(os.path.exists(path))
 
     def test_nonexistent_template(self):
         """Test with a nonexistent template file"""
         with self.assertRaises(FileNotFoundError):
-            self.generator.generate_form_letters(
+            self.generator._generate_form_letters(
                 template_path="/nonexistent/template.docx", recipients=self.recipients
             )
 
-    def _is_libreoffice_available(self):
-        """Check if LibreOffice is available on the system"""
-        import subprocess
-
-        try:
-            # Try to run LibreOffice with --version
-            subprocess.run(
-                ["soffice", "--version"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            return True
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
-
 
 if __name__ == "__main__":
     unittest.main()
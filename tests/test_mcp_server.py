@@ -3,84 +3,81 @@
 Tests for the MCP server implementation
 """
 
-import os
 import unittest
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
-# Add parent directory to path to import modules
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libreoffice_mcp.convert_pdf import PdfConverter
+from libreoffice_mcp.form_letters import FormLetterGenerator
+from libreoffice_mcp.server import _list_tools
 
-from src.server import mcp_server, tool_convert_docx_to_pdf, tool_generate_form_letters
+# Fixed data for the generate_form_letters tool test
+_TEMPLATE_PATH = "/path/to/template.docx"
+_RECIPIENTS = [
+    {"name": "John Doe", "address": "123 Main St"},
+    {"name": "Jane Smith", "address": "456 Oak Ave"}
+]
+_EXPECTED_PATHS = ["/tmp/letter1.pdf", "/tmp/letter2.pdf"]
+
+# Expected tools, reduced to what test_server_tools checks
+_EXPECTED_TOOLS_SHAPE = {
+    "convert_docx_to_pdf": {
+        "description": "Convert a .docx document to PDF format",
+        "parameters": {"file_path", "output_directory"},
+        "required": {"file_path"},
+    },
+    "generate_form_letters": {
+        "description": "Generate form letters from a template and recipient data",
+        "parameters": {"template_path", "recipients", "output_format"},
+        "required": {"template_path", "recipients"},
+    },
+}
+
+def _input_schema(tool):
+    """Get the input schema of a tool as sent to clients"""
+    return tool.model_dump(by_alias=True)["inputSchema"]
+
+def _tools_shape(tools):
+    """Reduce tools to their names, descriptions and parameter names"""
+    return {
+        tool.name: {
+            "description": tool.description,
+            "parameters": set(_input_schema(tool)["properties"]),
+            "required": set(_input_schema(tool).get("required", [])),
+        }
+        for tool in tools
+    }
 
 class TestMCPServer(unittest.TestCase):
     """Test cases for MCP server"""
     
-    def test_server_initialization(self):
-        """Test that the MCP server initializes correctly"""
-        self.assertEqual(mcp_server.name, "LibreOffice MCP Server")
-        self.assertEqual(mcp_server.description, "MCP server for interacting with LibreOffice")
-        self.assertEqual(mcp_server.version, "1.0.0")
+    @classmethod
+    def setUpClass(cls):
+        """Create the converter and form letter generator once"""
+        cls.converter = PdfConverter()
+        cls.generator = FormLetterGenerator()
     
     def test_server_tools(self):
         """Test that the server has the correct tools registered"""
         # Get the list of tools
-        tools = mcp_server.list_tools()
+        tools = _list_tools()
         
         # Check that we have exactly 2 tools
         self.assertEqual(len(tools), 2)
         
-        # Check that the tools have the expected names
-        tool_names = [tool.name for tool in tools]
-        self.assertIn("convert_docx_to_pdf", tool_names)
-        self.assertIn("generate_form_letters", tool_names)
-        
-        # Check details of the convert_docx_to_pdf tool
-        convert_tool = next(tool for tool in tools if tool.name == "convert_docx_to_pdf")
-        self.assertEqual(convert_tool.description, "Convert a .docx document to PDF format")
-        self.assertEqual(len(convert_tool.parameters), 2)
+        # Check the names, descriptions and parameters of all tools at once
+        self.assertEqual(_tools_shape(tools), _EXPECTED_TOOLS_SHAPE)
         
-        # Check parameters of convert_docx_to_pdf tool
-        param_names = [param.name for param in convert_tool.parameters]
-        self.assertIn("file_path", param_names)
-        self.assertIn("output_directory", param_names)
-        
-        # Check that file_path is required
-        file_path_param = next(param for param in convert_tool.parameters if param.name == "file_path")
-        self.assertTrue(file_path_param.required)
-        
-        # Check details of the generate_form_letters tool
+        # Check that output_format has a default value
         form_tool = next(tool for tool in tools if tool.name == "generate_form_letters")
-        self.assertEqual(form_tool.description, "Generate form letters from a template and recipient data")
-        self.assertEqual(len(form_tool.parameters), 3)
-        
-        # Check parameters of generate_form_letters tool
-        param_names = [param.name for param in form_tool.parameters]
-        self.assertIn("template_path", param_names)
-        self.assertIn("recipients", param_names)
-        self.assertIn("output_format", param_names)
-        
-        # Check that template_path and recipients are required
-        template_param = next(param for param in form_tool.parameters if param.name == "template_path")
-        self.assertTrue(template_param.required)
-        
-        recipients_param = next(param for param in form_tool.parameters if param.name == "recipients")
-        self.assertTrue(recipients_param.required)
-        
-        # Check that output_format is not required and has a default value
-        output_format_param = next(param for param in form_tool.parameters if param.name == "output_format")
-        self.assertFalse(output_format_param.required)
-        self.assertEqual(output_format_param.default, "pdf")
+        output_format_param = _input_schema(form_tool)["properties"]["output_format"]
+        self.assertEqual(output_format_param["default"], "pdf")
     
-    @patch('src.mcp_server.convert_to_pdf')
+    @patch.object(PdfConverter, "convert_to_pdf", return_value="/tmp/output.pdf")
     def test_convert_docx_to_pdf_tool(self, mock_convert):
         """Test the convert_docx_to_pdf tool function"""
-        # Set up the mock to return a specific path
-        mock_convert.return_value = "/tmp/output.pdf"
-        
         # Call the tool function
-        result = tool_convert_docx_to_pdf(file_path="/path/to/document.docx")
+        result = self.converter.tool_convert_docx_to_pdf(file_path="/path/to/document.docx")
         
         # Check that the mock was called with the correct arguments
         mock_convert.assert_called_once_with("/path/to/document.docx", None)
@@ -90,38 +87,25 @@ class TestMCPServer(unittest.TestCase):
         self.assertTrue(result["success"])
         self.assertEqual(result["message"], "Conversion successful")
     
-    @patch('src.mcp_server.FormLetterGenerator')
-    def test_generate_form_letters_tool(self, mock_generator_class):
+    @patch.object(FormLetterGenerator, "_generate_form_letters", return_value=_EXPECTED_PATHS)
+    def test_generate_form_letters_tool(self, mock_generate):
         """Test the generate_form_letters tool function"""
-        # Set up the mock
-        mock_generator = MagicMock()
-        mock_generator_class.return_value = mock_generator
-        mock_generator.generate_form_letters.return_value = ["/tmp/letter1.pdf", "/tmp/letter2.pdf"]
-        
-        # Test data
-        template_path = "/path/to/template.docx"
-        recipients = [
-            {"name": "John Doe", "address": "123 Main St"},
-            {"name": "Jane Smith", "address": "456 Oak Ave"}
-        ]
-        
         # Call the tool function
-        result = tool_generate_form_letters(
-            template_path=template_path,
-            recipients=recipients,
+        result = self.generator.tool_generate_form_letters(
+            template_path=_TEMPLATE_PATH,
+            recipients=_RECIPIENTS,
             output_format="pdf"
         )
         
         # Check that the mock was called with the correct arguments
-        mock_generator_class.assert_called_once()
-        mock_generator.generate_form_letters.assert_called_once_with(
-            template_path=template_path,
-            recipients=recipients,
+        mock_generate.assert_called_once_with(
+            template_path=_TEMPLATE_PATH,
+            recipients=_RECIPIENTS,
             output_format="pdf"
         )
         
         # Check the result
-        self.assertEqual(result["output_paths"], ["/tmp/letter1.pdf", "/tmp/letter2.pdf"])
+        self.assertEqual(result["output_paths"], _EXPECTED_PATHS)
         self.assertTrue(result["success"])
         self.assertEqual(result["message"], "Successfully generated 2 form letters")
 